@@ -0,0 +1,170 @@
+import asyncio
+from enum import Enum
+from anyio import to_thread
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+class RouteClass(str, Enum):
+    """Route classes that get independent concurrency limits."""
+    POINT_READ = "point_read"
+    LISTING = "listing"
+    AGGREGATION = "aggregation"
+    AUTH = "auth"
+    WRITE = "write"
+
+
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+def classify_route(method: str, path: str, prefix: str = "/api/v1") -> RouteClass | None:
+    """
+    Map a request to its route class.
+    Returns None for routes that are not admission controlled (docs, metrics...).
+    """
+    if not path.startswith(prefix):
+        return None
+    segments = [segment for segment in path[len(prefix):].split("/") if segment]
+    if not segments:
+        return None
+
+    if segments[0] == "auth":
+        return RouteClass.AUTH
+    if segments[0] != "books":
+        return None
+
+    if len(segments) == 1:
+        return RouteClass.WRITE if method in WRITE_METHODS else RouteClass.LISTING
+    if segments[1] == "stats":
+        return RouteClass.AGGREGATION
+    if segments[1] == "batch-get":
+        return RouteClass.LISTING
+    return RouteClass.WRITE if method in WRITE_METHODS else RouteClass.POINT_READ
+
+
+class RouteLimiter:
+    """Concurrency limit with a bounded wait queue for a single route class."""
+
+    def __init__(self, limit: int, queue_size: int):
+        """Initialize the limiter with its concurrency and queue bounds."""
+        self.limit = limit
+        self.queue_size = queue_size
+        self.active = 0
+        self.queued = 0
+        self.admitted = 0
+        self.rejected = 0
+        self._semaphore = asyncio.Semaphore(limit)
+
+    async def acquire(self, timeout: float) -> bool:
+        """Take a slot, waiting at most `timeout` seconds; False means shed the request."""
+        if self._semaphore.locked() and self.queued >= self.queue_size:
+            self.rejected += 1
+            return False
+
+        self.queued += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout)
+        except TimeoutError:
+            self.rejected += 1
+            return False
+        finally:
+            self.queued -= 1
+
+        self.active += 1
+        self.admitted += 1
+        return True
+
+    def release(self) -> None:
+        """Free a slot taken by `acquire`."""
+        self.active -= 1
+        self._semaphore.release()
+
+    def snapshot(self) -> dict:
+        """Current counters for monitoring."""
+        return {
+            "limit": self.limit,
+            "queue_size": self.queue_size,
+            "active": self.active,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+        }
+
+
+def size_threadpool(limits: dict[str, int], headroom: int) -> int:
+    """
+    Grow AnyIO's default thread limiter (40 tokens) so every admitted request gets a
+    worker: sync endpoints and dependencies hold one thread each, so the pool must
+    fit the sum of the class limits plus headroom for unclassified routes.
+    Must run inside the event loop (e.g. at startup); returns the resulting size.
+    """
+    limiter = to_thread.current_default_thread_limiter()
+    limiter.total_tokens = max(limiter.total_tokens, sum(limits.values()) + headroom)
+    return limiter.total_tokens
+
+
+class AdmissionController:
+    """Limiters for every route class, shared by the middleware and the metrics route."""
+
+    def __init__(self, limits: dict[str, int], queue_sizes: dict[str, int]):
+        """Initialize one limiter per configured route class."""
+        self.limiters = {
+            route_class: RouteLimiter(limit=limits[route_class.value], queue_size=queue_sizes.get(route_class.value, 0))
+            for route_class in RouteClass
+            if route_class.value in limits
+        }
+
+    def limiter_for(self, route_class: RouteClass | None) -> RouteLimiter | None:
+        """Limiter of a route class, or None if it is not admission controlled."""
+        return self.limiters.get(route_class)
+
+    def snapshot(self) -> dict:
+        """Counters for every route class."""
+        return {route_class.value: limiter.snapshot() for route_class, limiter in self.limiters.items()}
+
+
+class AdmissionControlMiddleware:
+    """
+    ASGI middleware that sheds load per route class.
+    Requests beyond a class limit wait in a bounded queue; when the queue is full
+    or the wait times out they fail fast with 503 and Retry-After, so expensive
+    listings or aggregations cannot starve cheap point reads.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        controller: AdmissionController,
+        queue_timeout: float,
+        retry_after: int,
+    ):
+        """Initialize the middleware with the shared controller."""
+        self.app = app
+        self.controller = controller
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route_class = classify_route(scope["method"], scope["path"])
+        limiter = self.controller.limiter_for(route_class)
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not await limiter.acquire(self.queue_timeout):
+            response = JSONResponse(
+                status_code=503,
+                content={"detail": f"Server overloaded ({route_class.value}), retry later"},
+                headers={"Retry-After": str(self.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
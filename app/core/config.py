@@ -12,6 +12,59 @@ class Settings(BaseSettings):
     JWT_ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     JWT_REFRESH_TOKEN_EXPIRE_DAYS: int = 7
 
+    BOOKS_BATCH_MAX_IDS: int = 500
+    BOOKS_SUGGEST_MAX_LIMIT: int = 20
+    BOOKS_SUGGEST_INDEX_TTL_SECONDS: int = 300
+
+    # Group commit for create_book: flush after max size or max wait (upper bound on added latency).
+    # Each waiting create holds a threadpool worker and an admission "write" slot, so a batch
+    # can never grow beyond ADMISSION_LIMITS["write"]; keep both values aligned.
+    BOOKS_WRITE_BATCHING_ENABLED: bool = False
+    BOOKS_WRITE_BATCH_MAX_SIZE: int = 16
+    BOOKS_WRITE_BATCH_MAX_WAIT_MS: int = 5
+    BOOKS_WRITE_BATCH_FLUSH_TIMEOUT_MS: int = 2000
+
+    # Admission control: concurrency limit and wait queue size per route class.
+    # Each admitted request holds one threadpool worker (including creates waiting on
+    # write batching), so at startup AnyIO's thread pool is grown to
+    # sum(ADMISSION_LIMITS) + ADMISSION_THREADPOOL_HEADROOM; otherwise the default
+    # 40 threads would let the expensive classes starve point reads.
+    ADMISSION_CONTROL_ENABLED: bool = True
+    ADMISSION_LIMITS: dict[str, int] = {
+        "point_read": 32,
+        "listing": 8,
+        "aggregation": 4,
+        "auth": 8,
+        "write": 16,
+    }
+    ADMISSION_QUEUE_SIZES: dict[str, int] = {
+        "point_read": 64,
+        "listing": 16,
+        "aggregation": 8,
+        "auth": 16,
+        "write": 32,
+    }
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = 1.0
+    ADMISSION_RETRY_AFTER_SECONDS: int = 1
+    ADMISSION_THREADPOOL_HEADROOM: int = 8
+
+    # Request deadlines per route class, applied to MongoDB calls as maxTimeMS
+    REQUEST_DEADLINE_ENABLED: bool = True
+    REQUEST_DEADLINES_MS: dict[str, int] = {
+        "point_read": 1000,
+        "listing": 3000,
+        "aggregation": 5000,
+        "auth": 2000,
+        "write": 2000,
+    }
+    REQUEST_DEADLINE_MAX_MS: int = 30000
+
+    # On-demand profiling (X-Profile header + debug:profile permission)
+    PROFILING_ENABLED: bool = True
+    PROFILE_OUTPUT_DIR: str = "/tmp/profiles"
+    # Only the newest pstats files are kept in PROFILE_OUTPUT_DIR
+    PROFILE_MAX_FILES: int = 50
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8", 
@@ -0,0 +1,105 @@
+import time
+from contextvars import ContextVar
+from functools import wraps
+from typing import Callable
+import pymongo
+from pymongo.errors import PyMongoError
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.core.admission import classify_route
+from app.core.profiling import profile_span
+
+DEADLINE_HEADER = b"x-request-deadline-ms"
+
+# Absolute monotonic deadline of the current request (None = no deadline)
+request_deadline: ContextVar[float | None] = ContextVar("request_deadline", default=None)
+
+deadline_counters = {"expired": 0}
+
+
+class DeadlineExceededError(Exception):
+    """Raised when the request deadline expires before or during a database call."""
+
+
+def remaining_seconds() -> float | None:
+    """Remaining budget of the current request, or None when it has no deadline."""
+    deadline = request_deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def with_deadline(method: Callable) -> Callable:
+    """
+    Run a repository method under the remaining request budget.
+    PyMongo's timeout() sends it to the server as maxTimeMS on every operation;
+    timeouts are surfaced as DeadlineExceededError. The call is also timed
+    as the "repository" span of profiled requests.
+    """
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        remaining = remaining_seconds()
+        if remaining is None:
+            with profile_span("repository"):
+                return method(*args, **kwargs)
+        if remaining <= 0:
+            raise DeadlineExceededError("Request deadline exceeded")
+        try:
+            with pymongo.timeout(remaining), profile_span("repository"):
+                return method(*args, **kwargs)
+        except PyMongoError as exc:
+            if exc.timeout:
+                raise DeadlineExceededError("Request deadline exceeded") from exc
+            raise
+        except TimeoutError as exc:
+            raise DeadlineExceededError("Request deadline exceeded") from exc
+    return wrapper
+
+
+class DeadlineMiddleware:
+    """
+    ASGI middleware that assigns each request a deadline from its route class,
+    optionally shortened by the X-Request-Deadline-Ms header.
+    """
+
+    def __init__(self, app: ASGIApp, deadlines_ms: dict[str, int], max_ms: int):
+        """Initialize the middleware with per route class budgets."""
+        self.app = app
+        self.deadlines_ms = deadlines_ms
+        self.max_ms = max_ms
+
+    def _budget_ms(self, scope: Scope) -> int | None:
+        """
+        Deadline budget for a request in milliseconds.
+        The header can only shorten the route class budget (it runs before
+        authentication); routes without a class are capped at `max_ms`.
+        Non-numeric or non-positive header values are ignored.
+        """
+        route_class = classify_route(scope["method"], scope["path"])
+        budget_ms = self.deadlines_ms.get(route_class.value) if route_class else None
+
+        for name, value in scope["headers"]:
+            if name == DEADLINE_HEADER:
+                try:
+                    requested_ms = int(value)
+                except ValueError:
+                    break
+                if requested_ms > 0:
+                    return min(requested_ms, budget_ms if budget_ms is not None else self.max_ms)
+                break
+        return budget_ms
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        budget_ms = self._budget_ms(scope)
+        if budget_ms is None:
+            await self.app(scope, receive, send)
+            return
+
+        token = request_deadline.set(time.monotonic() + budget_ms / 1000)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            request_deadline.reset(token)
@@ -1,7 +1,8 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from jwt import PyJWTError, decode
-from app.core.config import settings
+from jwt import PyJWTError
+from app.core.profiling import profile_span
+from app.core.security import decode_access_token
 
 bearer_scheme = HTTPBearer()
 
@@ -11,11 +12,8 @@ def get_current_token(
 ) -> dict:
     """Decode and validate the JWT token from the Authorization header."""
     try:
-        return decode(
-            credentials.credentials,
-            settings.JWT_SECRET_KEY,
-            algorithms=[settings.JWT_ALGORITHM],
-        )
+        with profile_span("auth"):
+            return decode_access_token(credentials.credentials)
     except PyJWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -33,4 +31,20 @@ def require_permission(permission: str) -> callable:
                 detail="Insufficient permissions",
             )
         return token
-    return permission_checker
\ No newline at end of file
+    return permission_checker
+
+def get_expected_version(if_match: str | None = Header(None)) -> int | None:
+    """
+    Parse the If-Match header (a strong ETag such as "3") into an expected book version.
+    `*` matches any existing book, so no version check is applied (writes never upsert).
+    Weak ETags (W/"3") are rejected: If-Match requires strong comparison.
+    """
+    if if_match is None or if_match.strip() == "*":
+        return None
+    try:
+        return int(if_match.strip('"'))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="If-Match must be a book version ETag",
+        )
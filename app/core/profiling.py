@@ -0,0 +1,197 @@
+import cProfile
+import inspect
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from pathlib import Path
+from typing import Any, Callable
+from fastapi.routing import APIRoute
+from jwt import PyJWTError
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.security import decode_access_token
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_PERMISSION = "debug:profile"
+ENDPOINT_RETURNED = "endpoint_returned_at"
+PROFILE_SUFFIX = ".pstats"
+
+# Span timings of the profiled request; None for every other request
+profile_timings: ContextVar[dict[str, float] | None] = ContextVar("profile_timings", default=None)
+
+
+@contextmanager
+def profile_span(name: str):
+    """Accumulate the time spent in a block when the current request is profiled."""
+    timings = profile_timings.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0.0) + time.perf_counter() - started
+
+
+def _can_profile(scope: Scope) -> bool:
+    """True when the request asks for profiling and its token grants debug:profile."""
+    headers = dict(scope["headers"])
+    if headers.get(PROFILE_HEADER) not in (b"1", b"true"):
+        return False
+
+    scheme, _, token = headers.get(b"authorization", b"").decode("latin-1").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    try:
+        payload = decode_access_token(token)
+    except PyJWTError:
+        return False
+    return PROFILE_PERMISSION in payload.get("permissions", [])
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware that profiles a single request on demand.
+
+    Triggered by `X-Profile: 1` from a token with `debug:profile`. The request runs
+    under cProfile and the stats are stored as `<profile_id>.pstats` in `output_dir`
+    for snakeviz/flameprof. On Python 3.12 cProfile also samples the threadpool
+    running sync endpoints, and therefore any request served concurrently: the
+    number of such requests is returned in `X-Profile-Concurrent-Requests` so a
+    contaminated profile can be discarded and retried. Only one request is profiled
+    at a time: profile requests arriving meanwhile run unprofiled and are answered
+    with `X-Profile-Skipped: busy`. Only the newest `max_files` stats files are kept.
+
+    A Server-Timing header reports auth, repository and serialization (from the
+    endpoint's return to the response start, measured by ProfiledRoute), plus
+    other (admission wait, routing, validation, profiler overhead) and total.
+    Untriggered requests only pay for a header lookup and an in-flight counter.
+    """
+
+    def __init__(self, app: ASGIApp, output_dir: str, max_files: int):
+        """Initialize the middleware with the directory that receives pstats files."""
+        self.app = app
+        self.output_dir = Path(output_dir)
+        self.max_files = max_files
+        self._in_flight = 0
+        # Only one cProfile can be active per interpreter
+        self._profiling = False
+        self._started_while_profiling = 0
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        self._in_flight += 1
+        if self._profiling:
+            self._started_while_profiling += 1
+        try:
+            if not _can_profile(scope):
+                await self.app(scope, receive, send)
+            elif self._profiling:
+                await self.app(scope, receive, self._mark_skipped(send))
+            else:
+                await self._profile(scope, receive, send)
+        finally:
+            self._in_flight -= 1
+
+    @staticmethod
+    def _mark_skipped(send: Send) -> Send:
+        """Wrap send to tell the client its profile request was not honored."""
+        async def send_with_marker(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)["X-Profile-Skipped"] = "busy"
+            await send(message)
+        return send_with_marker
+
+    async def _profile(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Run one request under cProfile and store its stats."""
+        self._profiling = True
+        self._started_while_profiling = 0
+        already_in_flight = self._in_flight - 1
+
+        profile_id = uuid.uuid4().hex
+        timings: dict[str, float] = {}
+        token = profile_timings.set(timings)
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+
+        async def send_with_timings(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                response_started = time.perf_counter()
+                spans = {
+                    "auth": timings.get("auth", 0.0),
+                    "repository": timings.get("repository", 0.0),
+                }
+                if ENDPOINT_RETURNED in timings:
+                    spans["serialization"] = response_started - timings[ENDPOINT_RETURNED]
+                spans["other"] = max(response_started - started - sum(spans.values()), 0.0)
+                spans["total"] = response_started - started
+                headers = MutableHeaders(scope=message)
+                headers["Server-Timing"] = ", ".join(
+                    f"{name};dur={seconds * 1000:.2f}" for name, seconds in spans.items()
+                )
+                headers["X-Profile-Id"] = profile_id
+                headers["X-Profile-Concurrent-Requests"] = str(already_in_flight + self._started_while_profiling)
+            await send(message)
+
+        try:
+            profiler.enable()
+            try:
+                await self.app(scope, receive, send_with_timings)
+            finally:
+                profiler.disable()
+                self._profiling = False
+            await run_in_threadpool(self._save, profiler, profile_id)
+        finally:
+            profile_timings.reset(token)
+
+    def _save(self, profiler: cProfile.Profile, profile_id: str) -> None:
+        """Write the stats file and prune the oldest ones (blocking I/O, run off the event loop)."""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(self.output_dir / f"{profile_id}{PROFILE_SUFFIX}")
+
+        stats_files = sorted(
+            self.output_dir.glob(f"*{PROFILE_SUFFIX}"),
+            key=lambda path: path.stat().st_mtime,
+            reverse=True,
+        )
+        for stale in stats_files[self.max_files:]:
+            stale.unlink(missing_ok=True)
+
+
+def _mark_endpoint_return(endpoint: Callable) -> Callable:
+    """Wrap an endpoint to record when it returns, for the serialization span."""
+    def record() -> None:
+        timings = profile_timings.get()
+        if timings is not None:
+            timings[ENDPOINT_RETURNED] = time.perf_counter()
+
+    if inspect.iscoroutinefunction(endpoint):
+        @wraps(endpoint)
+        async def async_wrapper(*args, **kwargs):
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                record()
+        return async_wrapper
+
+    @wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        try:
+            return endpoint(*args, **kwargs)
+        finally:
+            record()
+    return wrapper
+
+
+class ProfiledRoute(APIRoute):
+    """APIRoute that marks the endpoint's return so profiles can time serialization."""
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs: Any):
+        super().__init__(path, _mark_endpoint_return(endpoint), **kwargs)
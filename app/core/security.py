@@ -1,5 +1,5 @@
 from datetime import datetime, timedelta
-from jwt import encode
+from jwt import decode, encode
 import bcrypt
 from app.core.config import settings
 
@@ -25,3 +25,8 @@ def create_access_token(subject: str, claims: dict, expires_delta: timedelta = N
         "exp": datetime.utcnow() + (expires_delta or timedelta(minutes=settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES))
     }
     return encode(payload, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
+
+
+def decode_access_token(token: str) -> dict:
+    """Decode and validate a JWT access token (raises PyJWTError if invalid)."""
+    return decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
@@ -1,12 +1,67 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, status
+from fastapi.responses import JSONResponse
 from fastapi_pagination import add_pagination
-from app.routers import auth, books
+from app.core.admission import AdmissionControlMiddleware, AdmissionController, size_threadpool
+from app.core.config import settings
+from app.core.deadline import DeadlineExceededError, DeadlineMiddleware, deadline_counters
+from app.core.profiling import ProfilingMiddleware
+from app.routers import auth, books, metrics
 
-app = FastAPI(title="Books API", version="1.0.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Size the thread pool so admitted requests never wait for a worker."""
+    if settings.ADMISSION_CONTROL_ENABLED:
+        size_threadpool(settings.ADMISSION_LIMITS, settings.ADMISSION_THREADPOOL_HEADROOM)
+    yield
+
+
+app = FastAPI(title="Books API", version="1.0.0", lifespan=lifespan)
 
 prefix = "/api/v1"
 app.include_router(auth.router, prefix=prefix)
 app.include_router(books.router, prefix=prefix)
+app.include_router(metrics.router, prefix=prefix)
+
+# Shed load per route class so cheap reads survive bursts of expensive queries
+if settings.ADMISSION_CONTROL_ENABLED:
+    app.state.admission = AdmissionController(
+        limits=settings.ADMISSION_LIMITS,
+        queue_sizes=settings.ADMISSION_QUEUE_SIZES,
+    )
+    app.add_middleware(
+        AdmissionControlMiddleware,
+        controller=app.state.admission,
+        queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+        retry_after=settings.ADMISSION_RETRY_AFTER_SECONDS,
+    )
+
+# Added last so it wraps admission control: queue wait counts against the deadline
+if settings.REQUEST_DEADLINE_ENABLED:
+    app.add_middleware(
+        DeadlineMiddleware,
+        deadlines_ms=settings.REQUEST_DEADLINES_MS,
+        max_ms=settings.REQUEST_DEADLINE_MAX_MS,
+    )
+
+# Outermost so a profiled request includes admission and deadline handling
+if settings.PROFILING_ENABLED:
+    app.add_middleware(
+        ProfilingMiddleware,
+        output_dir=settings.PROFILE_OUTPUT_DIR,
+        max_files=settings.PROFILE_MAX_FILES,
+    )
+
+
+@app.exception_handler(DeadlineExceededError)
+async def deadline_exceeded_handler(request: Request, exc: DeadlineExceededError) -> JSONResponse:
+    """Return 504 when the request budget runs out during a database call."""
+    deadline_counters["expired"] += 1
+    return JSONResponse(
+        status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+        content={"detail": "Request deadline exceeded"},
+    )
 
 # Enable pagination support
 add_pagination(app)
\ No newline at end of file
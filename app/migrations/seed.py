@@ -55,6 +55,8 @@ upsert_user(
                     "user:create",
                     "user:update",
                     "user:delete",
+                    "metrics:read",
+                    "debug:profile",
                 ],
             }
         ],
@@ -11,3 +11,5 @@ class Book(BaseModel):
     published_date: datetime
     genre: str
     price: float
+    # Documents created before versioning have no version field
+    version: int = 0
@@ -1,16 +1,31 @@
 import re
+from app.core.deadline import remaining_seconds, with_deadline
 from app.models.book import Book
+from app.repositories.suggest_index import BookSuggestIndex
+from app.repositories.write_batcher import WriteBatcher
 from app.schemas.book import BookRequest
 from typing import Any
 from bson import ObjectId
+from pymongo import ReturnDocument
+
+
+class VersionConflictError(Exception):
+    """Raised when a write precondition on the book version fails."""
 
 
 class BookMongoRepository:
     """Repository for managing Book entities in MongoDB."""
 
-    def __init__(self, collection: Any):
-        """Initialize the repository with a MongoDB client."""
+    def __init__(
+        self,
+        collection: Any,
+        suggest_index: BookSuggestIndex | None = None,
+        write_batcher: WriteBatcher | None = None,
+    ):
+        """Initialize the repository with a MongoDB client and optional suggest index / write batcher."""
         self.collection = collection
+        self.suggest_index = suggest_index
+        self.write_batcher = write_batcher
 
     def _to_book(self, book_data: dict) -> Book:
         """Convert MongoDB document to Book model."""
@@ -52,6 +67,7 @@ class BookMongoRepository:
         # Always add _id as secondary sort for consistency
         return [(sort_by, direction), ("_id", direction)]
 
+    @with_deadline
     def get_book_by_id(self, book_id: str) -> Book | None:
         """Retrieve a book by its ID."""
         book_data = self.collection.find_one({"_id": ObjectId(book_id)})
@@ -59,50 +75,170 @@ class BookMongoRepository:
             return self._to_book(book_data)
         return None
 
+    @with_deadline
+    def get_books_by_ids(self, book_ids: list[str]) -> dict[str, Book]:
+        """
+        Retrieve many books with a single $in query.
+        Invalid ids are skipped; returns a dict keyed by the caller's id strings
+        (so differently cased spellings of the same id all resolve).
+        """
+        requested: dict[ObjectId, list[str]] = {}
+        for book_id in book_ids:
+            if ObjectId.is_valid(book_id):
+                requested.setdefault(ObjectId(book_id), []).append(book_id)
+        if not requested:
+            return {}
+
+        books = {}
+        for book_data in self.collection.find({"_id": {"$in": list(requested)}}):
+            object_id = book_data["_id"]
+            book = self._to_book(book_data)
+            for book_id in requested[object_id]:
+                books[book_id] = book
+        return books
+
+    @with_deadline
     def create_book(self, book: BookRequest) -> tuple[bool, Book | None]:
         """Create a new book and return success status with the book."""
         try:
             book_data = book.model_dump()
-            result = self.collection.insert_one(book_data)
-            # Avoid extra query to find book, use the inserted_id directly
-            book_data["_id"] = result.inserted_id
+            book_data["version"] = 1
+            if self.write_batcher:
+                # Coalesced with concurrent creates into a single insert_many
+                book_data["_id"] = self.write_batcher.insert(book_data, timeout=remaining_seconds())
+            else:
+                result = self.collection.insert_one(book_data)
+                # Avoid extra query to find book, use the inserted_id directly
+                book_data["_id"] = result.inserted_id
+            if self.suggest_index:
+                self.suggest_index.add(book_data)
             return True, self._to_book(book_data)
-        except Exception:
+        except Exception as exc:
+            # Deadline expiry must surface as a timeout, not as a failed create
+            if isinstance(exc, TimeoutError) or getattr(exc, "timeout", False):
+                raise
             return False, None
 
-    def update_book(self, book_id: str, updated_data: dict) -> tuple[bool, Book | None]:
+    def _version_filter(self, book_id: ObjectId, expected_version: int | None) -> dict:
+        """
+        Build the compare-and-set filter for a write.
+        Documents created before versioning have no `version` field and count as version 0.
+        """
+        query = {"_id": book_id}
+        if expected_version is not None:
+            query["version"] = expected_version if expected_version > 0 else {"$in": [0, None]}
+        return query
+
+    def _raise_if_conflict(self, book_id: str, expected_version: int | None) -> None:
+        """
+        A failed conditional write is a failed precondition, whether the book
+        changed or does not exist (HTTP If-Match semantics).
+        """
+        if expected_version is not None:
+            raise VersionConflictError(f"Book {book_id} does not match version {expected_version}")
+
+    def _set_fields(self, book_id: str, set_data: dict, expected_version: int | None) -> Book | None:
+        """
+        Apply $set and bump the version in a single round trip.
+        The previous document is returned by the write so the suggest index can
+        swap the old title/author for the new ones; the updated book is merged
+        locally from it. Returns None if the book does not exist.
+        """
+        if not ObjectId.is_valid(book_id):
+            self._raise_if_conflict(book_id, expected_version)
+            return None
+
+        object_id = ObjectId(book_id)
+        previous = self.collection.find_one_and_update(
+            self._version_filter(object_id, expected_version),
+            {"$set": set_data, "$inc": {"version": 1}},
+            return_document=ReturnDocument.BEFORE,
+        )
+        if previous is None:
+            self._raise_if_conflict(book_id, expected_version)
+            return None
+
+        book_data = previous | set_data
+        book_data["version"] = previous.get("version", 0) + 1
+        if self.suggest_index:
+            self.suggest_index.replace(previous, book_data)
+        return self._to_book(book_data)
+
+    @with_deadline
+    def update_book(
+        self,
+        book_id: str,
+        updated_data: dict,
+        expected_version: int | None = None,
+    ) -> tuple[bool, Book | None]:
         """
         Full update: Replace all fields with the provided data.
-        Returns the updated book using the sent data (no extra query).
+        Raises VersionConflictError if expected_version does not match or the book is missing.
         """
-        result = self.collection.update_one({"_id": ObjectId(book_id)}, {"$set": updated_data})
-        if result.matched_count > 0:
-            # Reuse sent data instead of querying again
-            updated_data["id"] = book_id
-            return True, Book(**updated_data)
-        return False, None
+        book = self._set_fields(book_id, updated_data, expected_version)
+        return book is not None, book
 
-    def patch_book(self, book_id: str, patch_data: dict) -> tuple[bool, Book | None]:
+    @with_deadline
+    def patch_book(
+        self,
+        book_id: str,
+        patch_data: dict,
+        expected_version: int | None = None,
+    ) -> tuple[bool, Book | None]:
         """
         Partial update: Only update the provided fields.
-        Merges with existing data to return complete book.
+        Raises VersionConflictError if expected_version does not match or the book is missing.
         """
         # Remove None values from patch_data
         patch_data = {k: v for k, v in patch_data.items() if v is not None}
         if not patch_data:
             return False, None
-        
-        result = self.collection.update_one({"_id": ObjectId(book_id)}, {"$set": patch_data})
-        if result.matched_count > 0:
-            # Need to get full book since we only have partial data
-            return True, self.get_book_by_id(book_id)
-        return False, None
 
-    def delete_book(self, book_id: str) -> bool:
-        """Delete a book by its ID."""
-        result = self.collection.delete_one({"_id": ObjectId(book_id)})
-        return result.deleted_count > 0
+        book = self._set_fields(book_id, patch_data, expected_version)
+        return book is not None, book
+
+    @with_deadline
+    def delete_book(self, book_id: str, expected_version: int | None = None) -> bool:
+        """
+        Delete a book by its ID.
+        Raises VersionConflictError if expected_version does not match or the book is missing.
+        """
+        if not ObjectId.is_valid(book_id):
+            self._raise_if_conflict(book_id, expected_version)
+            return False
+
+        object_id = ObjectId(book_id)
+        # The deleted document carries the title/author to drop from the suggest index
+        deleted = self.collection.find_one_and_delete(
+            self._version_filter(object_id, expected_version),
+            projection={field: 1 for field in BookSuggestIndex.FIELDS},
+        )
+        if deleted is None:
+            self._raise_if_conflict(book_id, expected_version)
+            return False
+
+        if self.suggest_index:
+            self.suggest_index.remove(deleted)
+        return True
+
+    @with_deadline
+    def suggest(self, field: str, prefix: str, limit: int = 10) -> list[str]:
+        """
+        Return up to `limit` distinct values of field starting with prefix.
+        Served from the in-memory suggest index, which loads in the background
+        outside the request deadline; falls back to an anchored regex when no
+        index is configured.
+        """
+        if self.suggest_index:
+            return self.suggest_index.suggest(
+                self.collection, field=field, prefix=prefix, limit=limit, timeout=remaining_seconds()
+            )
+
+        query = {field: {"$regex": f"^{re.escape(prefix)}", "$options": "i"}}
+        values = self.collection.distinct(field, query)
+        return sorted(values, key=str.casefold)[:limit]
 
+    @with_deadline
     def count_books(
         self,
         author: str | None = None,
@@ -113,6 +249,7 @@ class BookMongoRepository:
         query = self._build_filter_query(author=author, title=title, genre=genre)
         return self.collection.count_documents(query)
 
+    @with_deadline
     def list_books_paginated(
         self,
         skip: int = 0,
@@ -133,6 +270,7 @@ class BookMongoRepository:
         books = self.collection.find(query).sort(sort).skip(skip).limit(limit)
         return [self._to_book(book) for book in books]
     
+    @with_deadline
     def get_average_price_by_year(self, year: int | None = None) -> list[dict]:
         """
         Calculate the average price of books grouped by publication year.
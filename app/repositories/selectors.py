@@ -1,9 +1,27 @@
+from app.core.config import settings
 from app.db.mongo import books_collection, users_collection
 from app.repositories.book_mongo import BookMongoRepository
+from app.repositories.suggest_index import BookSuggestIndex
 from app.repositories.user_mongo import UserMongoRepository
+from app.repositories.write_batcher import WriteBatcher
+
+# Shared across requests so the prefix index is built once per process
+book_suggest_index = BookSuggestIndex(ttl_seconds=settings.BOOKS_SUGGEST_INDEX_TTL_SECONDS)
+
+# Optional write batching, shared so concurrent creates coalesce into one insert_many
+book_write_batcher = WriteBatcher(
+    collection=books_collection,
+    max_size=settings.BOOKS_WRITE_BATCH_MAX_SIZE,
+    max_wait_ms=settings.BOOKS_WRITE_BATCH_MAX_WAIT_MS,
+    flush_timeout_ms=settings.BOOKS_WRITE_BATCH_FLUSH_TIMEOUT_MS,
+) if settings.BOOKS_WRITE_BATCHING_ENABLED else None
 
 def get_book_repository() -> BookMongoRepository:
-    return BookMongoRepository(collection=books_collection)
+    return BookMongoRepository(
+        collection=books_collection,
+        suggest_index=book_suggest_index,
+        write_batcher=book_write_batcher,
+    )
 
 def get_user_repository() -> UserMongoRepository:
     return UserMongoRepository(collection=users_collection)
\ No newline at end of file
@@ -0,0 +1,169 @@
+import threading
+import time
+from concurrent.futures import Future
+from bisect import bisect_left, insort
+from typing import Any
+
+
+class PrefixIndex:
+    """Sorted array of normalized keys supporting prefix lookups via binary search."""
+
+    def __init__(self):
+        """Initialize an empty index."""
+        self._keys: list[tuple[str, str]] = []
+        self._counts: dict[str, int] = {}
+
+    @staticmethod
+    def normalize(value: str) -> str:
+        """Normalize a value for case-insensitive prefix matching."""
+        return value.strip().casefold()
+
+    def add(self, value: str) -> None:
+        """Add a value; duplicates are reference counted."""
+        if value in self._counts:
+            self._counts[value] += 1
+            return
+        self._counts[value] = 1
+        insort(self._keys, (self.normalize(value), value))
+
+    def remove(self, value: str) -> None:
+        """Remove one reference to a value, dropping it when no longer used."""
+        count = self._counts.get(value)
+        if count is None:
+            return
+        if count > 1:
+            self._counts[value] = count - 1
+            return
+        del self._counts[value]
+        key = (self.normalize(value), value)
+        position = bisect_left(self._keys, key)
+        if position < len(self._keys) and self._keys[position] == key:
+            self._keys.pop(position)
+
+    def suggest(self, prefix: str, limit: int) -> list[str]:
+        """Return up to `limit` values whose normalized form starts with prefix."""
+        normalized = self.normalize(prefix)
+        position = bisect_left(self._keys, (normalized, ""))
+        results = []
+        while position < len(self._keys) and len(results) < limit:
+            key, value = self._keys[position]
+            if not key.startswith(normalized):
+                break
+            results.append(value)
+            position += 1
+        return results
+
+
+class BookSuggestIndex:
+    """
+    In-memory prefix indexes for book titles and authors.
+    Kept up to date by the repository write methods; loaded lazily from the
+    collection and rebuilt after `ttl_seconds` so that writes made by other
+    workers are eventually picked up. Rebuilds scan in a background thread and
+    swap the result in, serving the previous index meanwhile. Writes made during
+    a scan are journaled and replayed onto the new indexes before the swap (a
+    write the scan already saw may then be counted twice until the next rebuild).
+    """
+
+    FIELDS = ("title", "author")
+
+    def __init__(self, ttl_seconds: int):
+        """Initialize the index with its rebuild interval."""
+        self.ttl_seconds = ttl_seconds
+        self._indexes: dict[str, PrefixIndex] = {}
+        self._loaded_at: float | None = None
+        # Pending background rebuild, if any, and the writes made while it scans
+        self._refresh: Future | None = None
+        self._journal: list[tuple[dict, str]] = []
+        # Guards the fields above; held only for lookups and single-book updates
+        self._lock = threading.Lock()
+
+    def _is_fresh(self) -> bool:
+        return self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl_seconds
+
+    def _build(self, collection: Any) -> dict[str, PrefixIndex]:
+        """Build every field index with a single projected scan."""
+        indexes = {field: PrefixIndex() for field in self.FIELDS}
+        projection = {field: 1 for field in self.FIELDS} | {"_id": 0}
+        for book_data in collection.find({}, projection):
+            for field in self.FIELDS:
+                if book_data.get(field):
+                    indexes[field].add(book_data[field])
+        return indexes
+
+    def _run_refresh(self, collection: Any, refresh: Future) -> None:
+        """Rebuild outside the lock and swap the new indexes in."""
+        try:
+            indexes = self._build(collection)
+            with self._lock:
+                for book_data, operation in self._journal:
+                    self._apply(indexes, book_data, operation)
+                self._indexes = indexes
+                self._loaded_at = time.monotonic()
+            refresh.set_result(None)
+        except Exception as exc:
+            refresh.set_exception(exc)
+        finally:
+            with self._lock:
+                self._refresh = None
+                self._journal = []
+
+    def _ensure_loaded(self, collection: Any, timeout: float | None) -> None:
+        """
+        Start a background rebuild when the index is missing or stale.
+        The scan runs in its own thread, outside the request deadline, so it always
+        completes; only the first load makes callers wait (up to `timeout`).
+        """
+        with self._lock:
+            if self._is_fresh():
+                return
+            if self._refresh is None:
+                self._refresh = Future()
+                threading.Thread(
+                    target=self._run_refresh,
+                    args=(collection, self._refresh),
+                    name="suggest-index-refresh",
+                    daemon=True,
+                ).start()
+            refresh = self._refresh
+            loaded = self._loaded_at is not None
+
+        if not loaded:
+            refresh.result(timeout=timeout)
+
+    def suggest(self, collection: Any, field: str, prefix: str, limit: int, timeout: float | None = None) -> list[str]:
+        """
+        Return completions for field, loading the index first if needed.
+        Raises TimeoutError if the first load does not finish within `timeout` seconds.
+        """
+        self._ensure_loaded(collection, timeout)
+        with self._lock:
+            return self._indexes[field].suggest(prefix, limit)
+
+    def _apply(self, indexes: dict[str, PrefixIndex], book_data: dict, operation: str) -> None:
+        for field in self.FIELDS:
+            if book_data.get(field):
+                getattr(indexes[field], operation)(book_data[field])
+
+    def _record(self, book_data: dict, operation: str) -> None:
+        """Apply a write to the live indexes and journal it for a rebuild in progress."""
+        if self._loaded_at is not None:
+            self._apply(self._indexes, book_data, operation)
+        if self._refresh is not None:
+            self._journal.append((book_data, operation))
+
+    def add(self, book_data: dict) -> None:
+        """Register the indexed fields of a new book."""
+        with self._lock:
+            self._record(book_data, "add")
+
+    def remove(self, book_data: dict) -> None:
+        """Unregister the indexed fields of a deleted book."""
+        with self._lock:
+            self._record(book_data, "remove")
+
+    def replace(self, old_data: dict, new_data: dict) -> None:
+        """Swap the indexed fields of an updated book."""
+        with self._lock:
+            self._record(old_data, "remove")
+            self._record(new_data, "add")
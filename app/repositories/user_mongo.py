@@ -1,3 +1,4 @@
+from app.core.deadline import with_deadline
 from app.models.user import User
 from typing import Any
 from bson import ObjectId
@@ -15,6 +16,7 @@ class UserMongoRepository:
         user_data["id"] = str(user_data.pop("_id"))
         return User(**user_data)
 
+    @with_deadline
     def get_user_by_email(self, email: str) -> User | None:
         """Retrieve a user by their email."""
         user_data = self.collection.find_one({"email": email})
@@ -22,6 +24,7 @@ class UserMongoRepository:
             return self._to_user(user_data)
         return None
 
+    @with_deadline
     def get_by_id(self, user_id: str) -> User | None:
         """Retrieve a user by their ID."""
         user_data = self.collection.find_one({"_id": ObjectId(user_id)})
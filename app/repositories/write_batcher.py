@@ -0,0 +1,115 @@
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any
+import pymongo
+from pymongo.errors import BulkWriteError, WriteConcernError, WriteError
+
+
+class WriteBatcher:
+    """
+    Group commit for inserts: concurrent callers are buffered and flushed with a
+    single insert_many once `max_size` documents are pending or the oldest one has
+    waited `max_wait_ms`. Each caller blocks until its own batch is flushed and
+    receives its inserted id or its own write error. Flushes run under
+    `pymongo.timeout(flush_timeout_ms)`, so a caller waits at most about
+    max_wait_ms + flush_timeout_ms even when the network hangs.
+    """
+
+    def __init__(self, collection: Any, max_size: int, max_wait_ms: int, flush_timeout_ms: int):
+        """Initialize the batcher; the flusher thread starts on first use."""
+        self.collection = collection
+        self.max_size = max_size
+        self.max_wait = max_wait_ms / 1000
+        self.flush_timeout = flush_timeout_ms / 1000
+        self._pending: list[tuple[dict, Future]] = []
+        self._oldest_at = 0.0
+        self._condition = threading.Condition()
+        self._thread: threading.Thread | None = None
+
+    def insert(self, document: dict, timeout: float | None = None) -> Any:
+        """
+        Queue a document and wait for its inserted id (raises on write errors).
+        Raises TimeoutError if the batch is not flushed within `timeout` seconds
+        (default: one batch window plus one flush); the document is then withdrawn
+        so it is never written after the caller gave up.
+        """
+        if timeout is None:
+            timeout = self.max_wait + self.flush_timeout
+        future = Future()
+        with self._condition:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="write-batcher", daemon=True)
+                self._thread.start()
+            if not self._pending:
+                self._oldest_at = time.monotonic()
+            self._pending.append((document, future))
+            self._condition.notify()
+
+        try:
+            return future.result(timeout=timeout)
+        except TimeoutError:
+            with self._condition:
+                for index, (_, pending) in enumerate(self._pending):
+                    if pending is future:
+                        del self._pending[index]
+                        raise
+        # Already taken by the flusher: the insert is in flight (bounded by the flush
+        # timeout), so report its real outcome
+        return future.result()
+
+    def _next_batch(self) -> list[tuple[dict, Future]]:
+        """Wait until a batch is full or its time window has elapsed, then take it."""
+        with self._condition:
+            while True:
+                while not self._pending:
+                    self._condition.wait()
+                deadline = self._oldest_at + self.max_wait
+                while self._pending and len(self._pending) < self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                # Timed-out callers may have withdrawn every pending document
+                if self._pending:
+                    break
+
+            batch = self._pending[:self.max_size]
+            # Leftovers keep the old timestamp so they are flushed right away
+            del self._pending[:self.max_size]
+            return batch
+
+    def _run(self) -> None:
+        while True:
+            self._flush(self._next_batch())
+
+    def _flush(self, batch: list[tuple[dict, Future]]) -> None:
+        """Insert a batch and resolve every caller's future."""
+        documents = [document for document, _ in batch]
+        try:
+            with pymongo.timeout(self.flush_timeout):
+                result = self.collection.insert_many(documents, ordered=False)
+        except BulkWriteError as exc:
+            # Unordered insert: only the documents listed in writeErrors failed,
+            # but a write concern error leaves every other document unacknowledged
+            failed = {error["index"]: error for error in exc.details.get("writeErrors", [])}
+            concern_errors = exc.details.get("writeConcernErrors", [])
+            for index, (document, future) in enumerate(batch):
+                error = failed.get(index)
+                if error:
+                    future.set_exception(WriteError(error.get("errmsg"), error.get("code"), error))
+                elif concern_errors:
+                    concern_error = concern_errors[0]
+                    future.set_exception(WriteConcernError(
+                        concern_error.get("errmsg"), concern_error.get("code"), concern_error
+                    ))
+                else:
+                    future.set_result(document["_id"])
+            return
+        except Exception as exc:
+            for _, future in batch:
+                future.set_exception(exc)
+            return
+
+        for (_, future), inserted_id in zip(batch, result.inserted_ids):
+            future.set_result(inserted_id)
@@ -1,21 +1,28 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from fastapi_pagination import Params
 from fastapi_pagination.links import Page
-from app.core.dependencies import require_permission
+from app.core.config import settings
+from app.core.dependencies import get_expected_version, require_permission
+from app.core.profiling import ProfiledRoute
+from app.repositories.book_mongo import VersionConflictError
 from app.repositories.selectors import get_book_repository
 from app.schemas.book import (
     BookRequest,
     BookPatchRequest,
     BookResponse,
     BookMutationResponse,
+    BookBatchRequest,
+    BookBatchResponse,
     SuccessResponse,
     SortField,
     SortOrder,
+    SuggestField,
+    SuggestResponse,
     AveragePriceByYearResponse,
     AveragePriceByYear,
 )
 
-router = APIRouter(prefix="/books", tags=["Books"])
+router = APIRouter(prefix="/books", tags=["Books"], route_class=ProfiledRoute)
 
 @router.get(
     "/",
@@ -82,52 +89,152 @@ def get_average_price_by_year(
     return AveragePriceByYearResponse(data=data)
 
 
+@router.get(
+    "/suggest",
+    response_model=SuggestResponse,
+    dependencies=[Depends(require_permission("book:read"))],
+)
+def suggest_books(
+    field: SuggestField = Query(..., description="Field to complete"),
+    prefix: str = Query(..., min_length=1, description="Case-insensitive prefix"),
+    limit: int = Query(10, ge=1, le=settings.BOOKS_SUGGEST_MAX_LIMIT, description="Maximum suggestions"),
+) -> SuggestResponse:
+    """
+    Type-ahead completions for titles or authors.
+
+    **Titles**: ?field=title&prefix=clea\n
+    **Authors**: ?field=author&prefix=rob&limit=5
+    """
+    book_repo = get_book_repository()
+    suggestions = book_repo.suggest(field=field.value, prefix=prefix, limit=limit)
+
+    return SuggestResponse(field=field, prefix=prefix, suggestions=suggestions)
+
+
+@router.post(
+    "/batch-get",
+    response_model=BookBatchResponse,
+    dependencies=[Depends(require_permission("book:read"))],
+)
+def batch_get_books(batch: BookBatchRequest) -> BookBatchResponse:
+    """
+    Retrieve many books by id with a single query.
+
+    Items are returned in request order; unknown or invalid ids are listed in `missing`.
+
+    **Body**: {"ids": ["<book_id>", "<book_id>"]}
+    """
+    if len(batch.ids) > settings.BOOKS_BATCH_MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Batch size exceeds the maximum of {settings.BOOKS_BATCH_MAX_IDS} ids",
+        )
+
+    book_repo = get_book_repository()
+    books = book_repo.get_books_by_ids(book_ids=batch.ids)
+
+    items = [BookResponse(**books[book_id].model_dump()) for book_id in batch.ids if book_id in books]
+    missing = [book_id for book_id in batch.ids if book_id not in books]
+    return BookBatchResponse(items=items, missing=missing)
+
+
+def _set_etag(response: Response, book: BookResponse | None) -> None:
+    """Expose the book version as an ETag for use in If-Match on later writes."""
+    if book:
+        response.headers["ETag"] = f'"{book.version}"'
+
+
+def _version_conflict() -> HTTPException:
+    """Build the 412 response for a failed If-Match precondition."""
+    return HTTPException(
+        status_code=status.HTTP_412_PRECONDITION_FAILED,
+        detail="Book was modified by another request or does not exist",
+    )
+
+
 @router.get("/{book_id}", response_model=BookResponse, dependencies=[Depends(require_permission("book:read"))])
-def get_book(book_id: str) -> BookResponse:
+def get_book(book_id: str, response: Response) -> BookResponse:
     """Retrieve a book by its ID."""
 
     book_repo = get_book_repository()
     book = book_repo.get_book_by_id(book_id=book_id)
 
+    _set_etag(response, book)
     return book
 
 @router.post("/", response_model=BookMutationResponse, dependencies=[Depends(require_permission("book:create"))])
-def create_book(book: BookRequest) -> BookMutationResponse:
+def create_book(book: BookRequest, response: Response) -> BookMutationResponse:
     """Create a new book."""
 
     book_repo = get_book_repository()
     success, new_book = book_repo.create_book(book=book)
 
     book_response = BookResponse(**new_book.model_dump()) if new_book else None
+    _set_etag(response, book_response)
     return BookMutationResponse(success=success, book=book_response)
 
 @router.put("/{book_id}", response_model=BookMutationResponse, dependencies=[Depends(require_permission("book:update"))])
-def update_book(book_id: str, book: BookRequest) -> BookMutationResponse:
-    """Full update of an existing book (all fields required)."""
+def update_book(
+    book_id: str,
+    book: BookRequest,
+    response: Response,
+    expected_version: int | None = Depends(get_expected_version),
+) -> BookMutationResponse:
+    """
+    Full update of an existing book (all fields required).
+
+    **Optimistic concurrency**: send `If-Match: "<version>"` to fail with 412 if the book changed.
+    """
 
     book_repo = get_book_repository()
-    success, updated_book = book_repo.update_book(book_id=book_id, updated_data=book.model_dump())
+    try:
+        success, updated_book = book_repo.update_book(
+            book_id=book_id, updated_data=book.model_dump(), expected_version=expected_version
+        )
+    except VersionConflictError:
+        raise _version_conflict()
 
     book_response = BookResponse(**updated_book.model_dump()) if updated_book else None
+    _set_etag(response, book_response)
     return BookMutationResponse(success=success, book=book_response)
 
 
 @router.patch("/{book_id}", response_model=BookMutationResponse, dependencies=[Depends(require_permission("book:update"))])
-def patch_book(book_id: str, book: BookPatchRequest) -> BookMutationResponse:
-    """Partial update of an existing book (only provided fields)."""
+def patch_book(
+    book_id: str,
+    book: BookPatchRequest,
+    response: Response,
+    expected_version: int | None = Depends(get_expected_version),
+) -> BookMutationResponse:
+    """
+    Partial update of an existing book (only provided fields).
+
+    **Optimistic concurrency**: send `If-Match: "<version>"` to fail with 412 if the book changed.
+    """
 
     book_repo = get_book_repository()
-    success, updated_book = book_repo.patch_book(book_id=book_id, patch_data=book.model_dump())
+    try:
+        success, updated_book = book_repo.patch_book(
+            book_id=book_id, patch_data=book.model_dump(), expected_version=expected_version
+        )
+    except VersionConflictError:
+        raise _version_conflict()
 
     book_response = BookResponse(**updated_book.model_dump()) if updated_book else None
+    _set_etag(response, book_response)
     return BookMutationResponse(success=success, book=book_response)
 
 @router.delete("/{book_id}", response_model=SuccessResponse, dependencies=[Depends(require_permission("book:delete"))])
-def delete_book(book_id: str) -> SuccessResponse:
-    """Delete a book by its ID."""
+def delete_book(
+    book_id: str,
+    expected_version: int | None = Depends(get_expected_version),
+) -> SuccessResponse:
+    """Delete a book by its ID (honours If-Match like updates)."""
 
     book_repo = get_book_repository()
-    success = book_repo.delete_book(book_id=book_id)
+    try:
+        success = book_repo.delete_book(book_id=book_id, expected_version=expected_version)
+    except VersionConflictError:
+        raise _version_conflict()
 
     return SuccessResponse(success=success)
-
@@ -0,0 +1,31 @@
+from pathlib import Path
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import FileResponse
+from app.core.config import settings
+from app.core.deadline import deadline_counters
+from app.core.dependencies import require_permission
+from app.core.profiling import PROFILE_PERMISSION, PROFILE_SUFFIX
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+
+@router.get("/admission", dependencies=[Depends(require_permission("metrics:read"))])
+def admission_metrics(request: Request) -> dict:
+    """Active requests, queue depth and rejection counts per route class."""
+    controller = getattr(request.app.state, "admission", None)
+    return controller.snapshot() if controller else {}
+
+
+@router.get("/deadlines", dependencies=[Depends(require_permission("metrics:read"))])
+def deadline_metrics() -> dict:
+    """Number of requests that returned 504 because their deadline expired."""
+    return dict(deadline_counters)
+
+
+@router.get("/profiles/{profile_id}", dependencies=[Depends(require_permission(PROFILE_PERMISSION))])
+def download_profile(profile_id: str) -> FileResponse:
+    """Download the pstats file of a profiled request (id from the X-Profile-Id header)."""
+    path = Path(settings.PROFILE_OUTPUT_DIR) / f"{profile_id}{PROFILE_SUFFIX}"
+    if not profile_id.isalnum() or not path.is_file():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    return FileResponse(path, media_type="application/octet-stream", filename=path.name)
@@ -17,6 +17,12 @@ class SortOrder(str, Enum):
     DESC = "desc"
 
 
+class SuggestField(str, Enum):
+    """Available fields for type-ahead suggestions."""
+    TITLE = "title"
+    AUTHOR = "author"
+
+
 class BookRequest(BaseModel):
     """Schema for creating a book (all fields required)."""
     title: str
@@ -42,6 +48,7 @@ class BookResponse(BaseModel):
     published_date: datetime
     genre: str
     price: float
+    version: int = 0
 
 
 class SuccessResponse(BaseModel):
@@ -52,6 +59,24 @@ class BookMutationResponse(SuccessResponse):
     book: BookResponse | None = None
 
 
+class BookBatchRequest(BaseModel):
+    """Schema for looking up many books by id in a single call."""
+    ids: list[str]
+
+
+class BookBatchResponse(BaseModel):
+    """Response schema for batch lookup (items keep request order)."""
+    items: list[BookResponse]
+    missing: list[str] = []
+
+
+class SuggestResponse(BaseModel):
+    """Response schema for type-ahead suggestions."""
+    field: SuggestField
+    prefix: str
+    suggestions: list[str]
+
+
 class CursorPageResponse(BaseModel):
     """Response schema for cursor-based pagination (no total count available)."""
     items: list[BookResponse]
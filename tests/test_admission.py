@@ -0,0 +1,108 @@
+"""Unit tests for admission control route classification and limiting."""
+import asyncio
+from types import SimpleNamespace
+import pytest
+
+from app.core.admission import (
+    AdmissionControlMiddleware,
+    AdmissionController,
+    RouteClass,
+    RouteLimiter,
+    classify_route,
+    size_threadpool,
+)
+from app.routers.metrics import admission_metrics
+
+
+@pytest.mark.parametrize("method,path,expected", [
+    ("GET", "/api/v1/books/507f1f77bcf86cd799439011", RouteClass.POINT_READ),
+    ("GET", "/api/v1/books/suggest", RouteClass.POINT_READ),
+    ("GET", "/api/v1/books/", RouteClass.LISTING),
+    ("POST", "/api/v1/books/batch-get", RouteClass.LISTING),
+    ("GET", "/api/v1/books/stats/average-price-by-year", RouteClass.AGGREGATION),
+    ("POST", "/api/v1/auth/login", RouteClass.AUTH),
+    ("POST", "/api/v1/books/", RouteClass.WRITE),
+    ("PATCH", "/api/v1/books/507f1f77bcf86cd799439011", RouteClass.WRITE),
+    ("GET", "/docs", None),
+])
+def test_classify_route(method, path, expected):
+    """Each request should map to the route class that limits it."""
+    assert classify_route(method, path) == expected
+
+
+def test_limiter_sheds_when_queue_is_full():
+    """Requests beyond limit + queue size should be rejected immediately."""
+    async def scenario():
+        limiter = RouteLimiter(limit=1, queue_size=1)
+        assert await limiter.acquire(timeout=1)
+
+        waiter = asyncio.create_task(limiter.acquire(timeout=1))
+        await asyncio.sleep(0)
+        assert limiter.snapshot()["queued"] == 1
+
+        assert not await limiter.acquire(timeout=1)
+        limiter.release()
+        assert await waiter
+        return limiter.snapshot()
+
+    stats = asyncio.run(scenario())
+    assert stats["rejected"] == 1
+    assert stats["admitted"] == 2
+    assert stats["active"] == 1
+
+
+def test_middleware_sheds_with_503_and_reports_metrics():
+    """Overflowing a route class should return 503 with Retry-After and show up in the metrics."""
+    release = asyncio.Event()
+
+    async def slow_app(scope, receive, send):
+        await release.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def call(middleware, path):
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {"type": "http", "method": "GET", "path": path, "headers": []}
+        await middleware(scope, receive, send)
+        return messages
+
+    controller = AdmissionController(limits={"listing": 1, "point_read": 1}, queue_sizes={"listing": 0})
+
+    async def scenario():
+        middleware = AdmissionControlMiddleware(slow_app, controller=controller, queue_timeout=1, retry_after=2)
+        admitted = asyncio.create_task(call(middleware, "/api/v1/books/"))
+        await asyncio.sleep(0)
+        shed = await call(middleware, "/api/v1/books/")
+        release.set()
+        return shed, await admitted
+
+    shed, admitted = asyncio.run(scenario())
+
+    assert shed[0]["status"] == 503
+    assert (b"retry-after", b"2") in shed[0]["headers"]
+    assert admitted[0]["status"] == 200
+
+    request = SimpleNamespace(app=SimpleNamespace(state=SimpleNamespace(admission=controller)))
+    stats = admission_metrics(request)
+    assert stats["listing"]["rejected"] == 1
+    assert stats["listing"]["admitted"] == 1
+    assert stats["point_read"]["rejected"] == 0
+
+
+def test_size_threadpool_fits_admission_limits():
+    """The worker pool should hold every admitted request plus headroom, and never shrink."""
+    limits = {"point_read": 32, "listing": 8, "aggregation": 4, "auth": 8, "write": 16}
+
+    async def scenario():
+        return size_threadpool(limits, headroom=8), size_threadpool({"listing": 1}, headroom=0)
+
+    grown, unchanged = asyncio.run(scenario())
+    assert grown == 76
+    assert unchanged == 76
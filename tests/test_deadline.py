@@ -0,0 +1,107 @@
+"""Unit tests for request deadlines applied to repository calls."""
+import asyncio
+import threading
+import time
+from unittest.mock import MagicMock
+import pytest
+
+from app.core.deadline import (
+    DeadlineExceededError,
+    DeadlineMiddleware,
+    deadline_counters,
+    remaining_seconds,
+    request_deadline,
+)
+from app.main import deadline_exceeded_handler
+from app.repositories.book_mongo import BookMongoRepository
+from app.repositories.suggest_index import BookSuggestIndex
+
+
+def test_remaining_seconds_without_deadline():
+    """Requests without a deadline should not limit database calls."""
+    assert remaining_seconds() is None
+
+
+def test_expired_deadline_skips_database_call():
+    """An exhausted budget should raise before reaching MongoDB."""
+    mock_collection = MagicMock()
+    repo = BookMongoRepository(mock_collection)
+
+    token = request_deadline.set(time.monotonic() - 1)
+    try:
+        with pytest.raises(DeadlineExceededError):
+            repo.count_books(title="Python")
+    finally:
+        request_deadline.reset(token)
+
+    mock_collection.count_documents.assert_not_called()
+
+
+def test_suggest_index_load_outlives_request_deadline():
+    """A slow first load should 504 the waiting request but still complete for later ones."""
+    loaded = threading.Event()
+    mock_collection = MagicMock()
+
+    def slow_scan(query, projection):
+        loaded.wait(timeout=5)
+        return [{"title": "Clean Code", "author": "Robert Martin"}]
+
+    mock_collection.find.side_effect = slow_scan
+    repo = BookMongoRepository(mock_collection, suggest_index=BookSuggestIndex(ttl_seconds=300))
+
+    token = request_deadline.set(time.monotonic() + 0.05)
+    try:
+        with pytest.raises(DeadlineExceededError):
+            repo.suggest(field="title", prefix="clean")
+    finally:
+        request_deadline.reset(token)
+
+    loaded.set()
+    assert repo.suggest(field="title", prefix="clean") == ["Clean Code"]
+    mock_collection.find.assert_called_once()
+
+
+def _budget_seen_by_app(path: str, headers: list[tuple[bytes, bytes]]) -> float | None:
+    """Run DeadlineMiddleware for one request and return the budget visible downstream."""
+    seen = {}
+
+    async def app(scope, receive, send):
+        seen["remaining"] = remaining_seconds()
+
+    middleware = DeadlineMiddleware(app, deadlines_ms={"listing": 3000, "point_read": 1000}, max_ms=10000)
+    scope = {"type": "http", "method": "GET", "path": path, "headers": headers}
+    asyncio.run(middleware(scope, None, None))
+    return seen["remaining"]
+
+
+@pytest.mark.parametrize("path,headers,expected_seconds", [
+    ("/api/v1/books/", [], 3.0),
+    ("/api/v1/books/507f1f77bcf86cd799439011", [], 1.0),
+    ("/api/v1/books/", [(b"x-request-deadline-ms", b"500")], 0.5),
+    ("/api/v1/books/", [(b"x-request-deadline-ms", b"5000")], 3.0),
+    ("/api/v1/books/", [(b"x-request-deadline-ms", b"99999")], 3.0),
+    ("/docs", [(b"x-request-deadline-ms", b"99999")], 10.0),
+    ("/api/v1/books/", [(b"x-request-deadline-ms", b"abc")], 3.0),
+    ("/api/v1/books/", [(b"x-request-deadline-ms", b"-5")], 3.0),
+    ("/api/v1/books/", [(b"x-request-deadline-ms", b"0")], 3.0),
+])
+def test_middleware_budget_per_route_and_header(path, headers, expected_seconds):
+    """Budgets come from the route class; a positive header may only shorten them (max_ms for unclassified routes)."""
+    remaining = _budget_seen_by_app(path, headers)
+    assert expected_seconds - 0.1 < remaining <= expected_seconds
+
+
+def test_middleware_skips_unclassified_routes():
+    """Routes outside the API (docs, openapi) should get no deadline."""
+    assert _budget_seen_by_app("/docs", []) is None
+    assert request_deadline.get() is None
+
+
+def test_deadline_exceeded_handler_returns_504_and_counts():
+    """Expired requests should map to 504 and increment the expired counter."""
+    expired_before = deadline_counters["expired"]
+
+    response = asyncio.run(deadline_exceeded_handler(None, DeadlineExceededError()))
+
+    assert response.status_code == 504
+    assert deadline_counters["expired"] == expired_before + 1
@@ -0,0 +1,23 @@
+"""Unit tests for request dependencies."""
+import pytest
+from fastapi import HTTPException
+
+from app.core.dependencies import get_expected_version
+
+
+@pytest.mark.parametrize("if_match,expected", [
+    (None, None),
+    ("*", None),
+    ('"3"', 3),
+])
+def test_get_expected_version(if_match, expected):
+    """If-Match should map to a version, with `*` meaning any existing book."""
+    assert get_expected_version(if_match=if_match) == expected
+
+
+@pytest.mark.parametrize("if_match", ['"abc"', 'W/"3"'])
+def test_get_expected_version_rejects_malformed_or_weak_etag(if_match):
+    """Malformed and weak If-Match values should be rejected with 400."""
+    with pytest.raises(HTTPException) as exc_info:
+        get_expected_version(if_match=if_match)
+    assert exc_info.value.status_code == 400
@@ -0,0 +1,125 @@
+"""Unit tests for the on-demand profiling hook."""
+import asyncio
+import cProfile
+import os
+import time
+import pytest
+
+from app.core.profiling import (
+    ProfilingMiddleware,
+    _can_profile,
+    _mark_endpoint_return,
+    profile_span,
+    profile_timings,
+)
+from app.core.security import create_access_token
+
+
+def test_profile_span_is_noop_without_profiled_request():
+    """Spans should not record anything when the request is not profiled."""
+    with profile_span("repository"):
+        pass
+    assert profile_timings.get() is None
+
+
+def test_profile_span_accumulates_timings():
+    """Spans with the same name should add up within a profiled request."""
+    timings = {}
+    token = profile_timings.set(timings)
+    try:
+        with profile_span("repository"):
+            pass
+        with profile_span("repository"):
+            pass
+    finally:
+        profile_timings.reset(token)
+
+    assert list(timings) == ["repository"]
+    assert timings["repository"] >= 0
+
+
+@pytest.mark.parametrize("permissions,header,expected", [
+    (["book:read", "debug:profile"], b"1", True),
+    (["book:read"], b"1", False),
+    (["debug:profile"], None, False),
+])
+def test_can_profile_requires_header_and_permission(permissions, header, expected):
+    """Profiling should only trigger for X-Profile from tokens with debug:profile."""
+    token = create_access_token(subject="admin@test.com", claims={"permissions": permissions})
+    headers = [(b"authorization", f"Bearer {token}".encode())]
+    if header is not None:
+        headers.append((b"x-profile", header))
+
+    assert _can_profile({"type": "http", "headers": headers}) is expected
+
+
+def test_middleware_times_serialization_and_stores_stats(tmp_path):
+    """A profiled request should report each span, concurrency and write its pstats file."""
+    endpoint = _mark_endpoint_return(lambda: {"ok": True})
+
+    async def app(scope, receive, send):
+        with profile_span("repository"):
+            endpoint()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    token = create_access_token(subject="admin@test.com", claims={"permissions": ["debug:profile"]})
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/api/v1/books/",
+        "headers": [(b"authorization", f"Bearer {token}".encode()), (b"x-profile", b"1")],
+    }
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(ProfilingMiddleware(app, output_dir=str(tmp_path), max_files=5)(scope, None, send))
+
+    headers = dict(messages[0]["headers"])
+    spans = [entry.split(";")[0] for entry in headers[b"server-timing"].decode().split(", ")]
+    assert spans == ["auth", "repository", "serialization", "other", "total"]
+    assert headers[b"x-profile-concurrent-requests"] == b"0"
+    assert (tmp_path / f"{headers[b'x-profile-id'].decode()}.pstats").is_file()
+
+
+def test_middleware_marks_profile_requests_skipped_while_busy(tmp_path):
+    """A profile request arriving while another one is profiled should be told it was skipped."""
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    token = create_access_token(subject="admin@test.com", claims={"permissions": ["debug:profile"]})
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/api/v1/books/",
+        "headers": [(b"authorization", f"Bearer {token}".encode()), (b"x-profile", b"1")],
+    }
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    middleware = ProfilingMiddleware(app, output_dir=str(tmp_path), max_files=5)
+    middleware._profiling = True
+    asyncio.run(middleware(scope, None, send))
+
+    headers = dict(messages[0]["headers"])
+    assert headers[b"x-profile-skipped"] == b"busy"
+    assert b"x-profile-id" not in headers
+    assert not list(tmp_path.iterdir())
+
+
+def test_save_keeps_only_newest_stats_files(tmp_path):
+    """Saving a profile should prune the oldest pstats files beyond max_files."""
+    for age, name in enumerate(["c", "b", "a"], start=1):
+        path = tmp_path / f"{name}.pstats"
+        path.write_bytes(b"")
+        os.utime(path, (time.time() - age * 60, time.time() - age * 60))
+
+    middleware = ProfilingMiddleware(app=None, output_dir=str(tmp_path), max_files=2)
+    middleware._save(cProfile.Profile(), "new")
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["c.pstats", "new.pstats"]
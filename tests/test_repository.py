@@ -1,5 +1,12 @@
 """Unit tests for BookMongoRepository using mocks."""
-from app.repositories.book_mongo import BookMongoRepository
+import threading
+from datetime import datetime
+import pytest
+from unittest.mock import MagicMock
+from bson import ObjectId
+from app.repositories.book_mongo import BookMongoRepository, VersionConflictError
+from app.repositories.suggest_index import BookSuggestIndex
+from app.schemas.book import BookRequest
 
 
 def test_get_book_by_id_with_mock(mock_book_collection):
@@ -18,4 +25,151 @@ def test_get_book_by_id_with_mock(mock_book_collection):
     mock_collection.find_one.assert_called_once()
     assert book.id == book_id
     assert book.title == "Clean Code"
-    assert book.price == 39.99
\ No newline at end of file
+    assert book.price == 39.99
+
+def test_get_books_by_ids_uses_single_in_query():
+    """Repository should resolve many ids with one $in query and skip invalid ids."""
+    found_id = "507f1f77bcf86cd799439011"
+    mock_collection = MagicMock()
+    mock_collection.find.return_value = [{
+        "_id": ObjectId(found_id),
+        "title": "Clean Code",
+        "author": "Robert Martin",
+        "published_date": datetime(2008, 8, 1),
+        "genre": "Software",
+        "price": 39.99,
+    }]
+
+    repo = BookMongoRepository(mock_collection)
+    books = repo.get_books_by_ids([found_id, found_id.upper(), "507f1f77bcf86cd799439012", "not-an-id"])
+
+    mock_collection.find.assert_called_once()
+    query = mock_collection.find.call_args.args[0]
+    assert len(query["_id"]["$in"]) == 2
+    assert list(books) == [found_id, found_id.upper()]
+    assert books[found_id.upper()].title == "Clean Code"
+
+
+def test_suggest_uses_prefix_index_and_tracks_creates():
+    """Suggestions should be case-insensitive prefix matches, loaded once and updated on create."""
+    mock_collection = MagicMock()
+    mock_collection.find.return_value = [
+        {"title": "Clean Code", "author": "Robert Martin"},
+        {"title": "Clean Architecture", "author": "Robert Martin"},
+        {"title": "Refactoring", "author": "Martin Fowler"},
+    ]
+    mock_collection.insert_one.return_value = MagicMock(inserted_id=ObjectId())
+
+    repo = BookMongoRepository(mock_collection, suggest_index=BookSuggestIndex(ttl_seconds=300))
+    assert repo.suggest(field="title", prefix="clean", limit=10) == ["Clean Architecture", "Clean Code"]
+    assert repo.suggest(field="author", prefix="ROB", limit=10) == ["Robert Martin"]
+
+    repo.create_book(BookRequest(
+        title="Clean Agile",
+        author="Robert Martin",
+        published_date=datetime(2019, 9, 1),
+        genre="Software",
+        price=29.99,
+    ))
+
+    assert repo.suggest(field="title", prefix="Clean A", limit=1) == ["Clean Agile"]
+    mock_collection.find.assert_called_once()
+
+
+def test_patch_book_single_round_trip_bumps_version():
+    """Patch should use one find_one_and_update guarded by the expected version and merge the result."""
+    book_id = "507f1f77bcf86cd799439011"
+    mock_collection = MagicMock()
+    mock_collection.find_one_and_update.return_value = {
+        "_id": ObjectId(book_id),
+        "title": "Clean Code",
+        "author": "Robert Martin",
+        "published_date": datetime(2008, 8, 1),
+        "genre": "Software",
+        "price": 39.99,
+        "version": 2,
+    }
+
+    repo = BookMongoRepository(mock_collection)
+    success, book = repo.patch_book(book_id, {"price": 19.99, "title": None}, expected_version=2)
+
+    query, update = mock_collection.find_one_and_update.call_args.args
+    assert query == {"_id": ObjectId(book_id), "version": 2}
+    assert update == {"$set": {"price": 19.99}, "$inc": {"version": 1}}
+    mock_collection.find_one.assert_not_called()
+    assert success and book.version == 3 and book.price == 19.99
+
+
+def test_update_book_detects_lost_update_and_invalid_id():
+    """A stale expected version should raise; an invalid id should not reach MongoDB."""
+    mock_collection = MagicMock()
+    mock_collection.find_one_and_update.return_value = None
+
+    repo = BookMongoRepository(mock_collection)
+    with pytest.raises(VersionConflictError):
+        repo.update_book("507f1f77bcf86cd799439011", {"price": 10.0}, expected_version=1)
+    with pytest.raises(VersionConflictError):
+        repo.delete_book("not-an-id", expected_version=1)
+
+    assert repo.update_book("not-an-id", {"price": 10.0}) == (False, None)
+    mock_collection.find_one_and_update.assert_called_once()
+
+
+def test_writes_keep_suggest_index_up_to_date():
+    """Updates and deletes should swap the old title/author without rescanning the collection."""
+    book_id = "507f1f77bcf86cd799439011"
+    previous = {
+        "_id": ObjectId(book_id),
+        "title": "Clean Code",
+        "author": "Robert Martin",
+        "published_date": datetime(2008, 8, 1),
+        "genre": "Software",
+        "price": 39.99,
+        "version": 1,
+    }
+    mock_collection = MagicMock()
+    mock_collection.find.return_value = [{"title": "Clean Code", "author": "Robert Martin"}]
+    mock_collection.find_one_and_update.return_value = dict(previous)
+    mock_collection.find_one_and_delete.return_value = {"_id": ObjectId(book_id), "title": "Clean Code 2nd", "author": "Robert Martin"}
+
+    repo = BookMongoRepository(mock_collection, suggest_index=BookSuggestIndex(ttl_seconds=300))
+    assert repo.suggest(field="title", prefix="clean", limit=10) == ["Clean Code"]
+
+    repo.patch_book(book_id, {"title": "Clean Code 2nd"})
+    assert repo.suggest(field="title", prefix="clean", limit=10) == ["Clean Code 2nd"]
+
+    assert repo.delete_book(book_id)
+    assert repo.suggest(field="title", prefix="clean", limit=10) == []
+    assert repo.suggest(field="author", prefix="rob", limit=10) == []
+    mock_collection.find.assert_called_once()
+
+
+def test_delete_during_rebuild_is_replayed_onto_new_index():
+    """A write that lands while a rebuild scans must survive the swap."""
+    scan_started = threading.Event()
+    release_scan = threading.Event()
+    mock_collection = MagicMock()
+    mock_collection.find.return_value = [{"title": "Clean Code", "author": "Robert Martin"}]
+
+    index = BookSuggestIndex(ttl_seconds=300)
+    assert index.suggest(mock_collection, field="title", prefix="clean", limit=10) == ["Clean Code"]
+
+    def slow_scan(query, projection):
+        # The scan read the book before it was deleted
+        scan_started.set()
+        release_scan.wait(timeout=5)
+        return [{"title": "Clean Code", "author": "Robert Martin"}]
+
+    mock_collection.find.side_effect = slow_scan
+    index.ttl_seconds = 0
+    index.suggest(mock_collection, field="title", prefix="clean", limit=10)
+    index.ttl_seconds = 300
+    refresh = index._refresh
+    assert scan_started.wait(timeout=5)
+
+    index.remove({"title": "Clean Code", "author": "Robert Martin"})
+    release_scan.set()
+    refresh.result(timeout=5)
+
+    assert index.suggest(mock_collection, field="title", prefix="clean", limit=10) == []
+    assert mock_collection.find.call_count == 2
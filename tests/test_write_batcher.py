@@ -0,0 +1,151 @@
+"""Unit tests for WriteBatcher group commit using mocks."""
+import threading
+import pytest
+from unittest.mock import MagicMock, patch
+from bson import ObjectId
+from pymongo.errors import BulkWriteError, WriteConcernError, WriteError
+
+from app.repositories.write_batcher import WriteBatcher
+
+
+def _insert_concurrently(batcher: WriteBatcher, documents: list[dict]) -> list:
+    """Insert each document from its own thread and collect ids or errors."""
+    results = [None] * len(documents)
+
+    def worker(index: int):
+        try:
+            results[index] = batcher.insert(documents[index])
+        except Exception as exc:
+            results[index] = exc
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(len(documents))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+    return results
+
+
+def test_concurrent_inserts_are_flushed_with_one_insert_many():
+    """A full batch should be written in a single round trip with one id per caller."""
+    mock_collection = MagicMock()
+
+    def insert_many(documents, ordered):
+        for document in documents:
+            document["_id"] = ObjectId()
+        return MagicMock(inserted_ids=[document["_id"] for document in documents])
+
+    mock_collection.insert_many.side_effect = insert_many
+    documents = [{"title": f"Book {index}"} for index in range(3)]
+
+    results = _insert_concurrently(WriteBatcher(mock_collection, max_size=3, max_wait_ms=1000, flush_timeout_ms=1000), documents)
+
+    mock_collection.insert_many.assert_called_once()
+    assert results == [document["_id"] for document in documents]
+
+
+def test_write_errors_are_reported_to_the_failing_caller_only():
+    """With an unordered insert, only the documents in writeErrors should fail."""
+    mock_collection = MagicMock()
+
+    def insert_many(documents, ordered):
+        for document in documents:
+            document["_id"] = ObjectId()
+        failing = next(index for index, document in enumerate(documents) if document["title"] == "dup")
+        raise BulkWriteError({"writeErrors": [{"index": failing, "code": 11000, "errmsg": "duplicate key"}]})
+
+    mock_collection.insert_many.side_effect = insert_many
+    documents = [{"title": "ok"}, {"title": "dup"}]
+
+    results = _insert_concurrently(WriteBatcher(mock_collection, max_size=2, max_wait_ms=1000, flush_timeout_ms=1000), documents)
+
+    assert results[0] == documents[0]["_id"]
+    assert isinstance(results[1], WriteError)
+
+
+def test_write_concern_errors_fail_the_other_callers():
+    """Documents without their own write error are unacknowledged when the write concern fails."""
+    mock_collection = MagicMock()
+
+    def insert_many(documents, ordered):
+        for document in documents:
+            document["_id"] = ObjectId()
+        raise BulkWriteError({
+            "writeErrors": [],
+            "writeConcernErrors": [{"code": 64, "errmsg": "waiting for replication timed out"}],
+        })
+
+    mock_collection.insert_many.side_effect = insert_many
+    documents = [{"title": "a"}, {"title": "b"}]
+
+    results = _insert_concurrently(WriteBatcher(mock_collection, max_size=2, max_wait_ms=1000, flush_timeout_ms=1000), documents)
+
+    assert all(isinstance(result, WriteConcernError) for result in results)
+
+
+def test_timed_out_insert_is_withdrawn_before_flush():
+    """A caller that times out while queued must not be written afterwards."""
+    mock_collection = MagicMock()
+    batcher = WriteBatcher(mock_collection, max_size=10, max_wait_ms=200, flush_timeout_ms=1000)
+
+    with pytest.raises(TimeoutError):
+        batcher.insert({"title": "late"}, timeout=0.01)
+
+    # Past the batch window: a leaked document would have been flushed by now
+    threading.Event().wait(0.3)
+    mock_collection.insert_many.assert_not_called()
+
+
+def test_timed_out_insert_already_flushing_returns_its_id():
+    """A caller whose batch is already being written should get the real outcome, not a timeout."""
+    mock_collection = MagicMock()
+    release = threading.Event()
+
+    def insert_many(documents, ordered):
+        release.wait(timeout=5)
+        for document in documents:
+            document["_id"] = ObjectId()
+        return MagicMock(inserted_ids=[document["_id"] for document in documents])
+
+    mock_collection.insert_many.side_effect = insert_many
+    batcher = WriteBatcher(mock_collection, max_size=1, max_wait_ms=0, flush_timeout_ms=1000)
+    threading.Timer(0.05, release.set).start()
+
+    document = {"title": "slow"}
+    assert batcher.insert(document, timeout=0.01) == document["_id"]
+
+
+def test_flush_runs_under_pymongo_timeout():
+    """Each insert_many should be bounded by the configured flush timeout."""
+    mock_collection = MagicMock()
+    mock_collection.insert_many.return_value = MagicMock(inserted_ids=["id"])
+
+    with patch("app.repositories.write_batcher.pymongo.timeout") as mock_timeout:
+        batcher = WriteBatcher(mock_collection, max_size=1, max_wait_ms=0, flush_timeout_ms=250)
+        assert batcher.insert({"title": "a"}) == "id"
+
+    mock_timeout.assert_called_once_with(0.25)
+
+
+def test_hung_flush_does_not_block_later_creates_forever():
+    """Without a request deadline, a create queued behind a stuck flush should time out and be withdrawn."""
+    mock_collection = MagicMock()
+    release = threading.Event()
+
+    def stuck_insert_many(documents, ordered):
+        release.wait(timeout=5)
+        return MagicMock(inserted_ids=[None] * len(documents))
+
+    mock_collection.insert_many.side_effect = stuck_insert_many
+    batcher = WriteBatcher(mock_collection, max_size=1, max_wait_ms=0, flush_timeout_ms=50)
+    first = threading.Thread(target=batcher.insert, args=({"title": "stuck"},), kwargs={"timeout": 5})
+    first.start()
+    while not mock_collection.insert_many.called:
+        threading.Event().wait(0.01)
+
+    with pytest.raises(TimeoutError):
+        batcher.insert({"title": "queued"})
+
+    release.set()
+    first.join(timeout=5)
+    assert mock_collection.insert_many.call_count == 1